@@ -0,0 +1,256 @@
+"""Headless JSON API for scripts and mobile clients.
+
+Run with: python api.py --port 8000
+
+Tokens expire after auth.API_TOKEN_TTL_DAYS and are revoked when the password changes.
+
+Endpoints (all but POST /api/token need an "Authorization: Bearer <token>" header):
+    POST /api/token             {"username", "password"} -> {"token"}
+    DELETE /api/token           revoke the token sent in the Authorization header
+    POST /api/transactions      [{"name", "category", "amount", "type", "date", "tags"}, ...]
+    GET  /api/transactions      ?limit=100&offset=0&start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
+                                (start_date defaults to the start of the hot tier; pass an
+                                earlier one to page through archived transactions)
+    GET  /api/summary
+    GET  /api/budgets/status
+"""
+import argparse
+import gzip
+import json
+import logging
+import zlib
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from database import init_db, update_db_schema
+from auth import verify_user, create_api_token, get_token_user, revoke_api_token
+from transactions import add_transactions, get_transactions_page, get_budget, get_latest_seq, prune_change_log
+from archive import get_hot_start_date, get_monthly_totals
+from viz import create_financial_summary, create_budget_status
+
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 5000
+MAX_BODY_SIZE = MAX_BATCH_SIZE * 1024
+GZIP_MIN_SIZE = 1024
+REQUIRED_FIELDS = ("name", "category", "amount", "type", "date")
+TRANSACTION_TYPES = ("Income", "Expense")
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def list_transactions(username, query):
+    try:
+        limit = min(int(query.get("limit", ["100"])[0]), MAX_PAGE_SIZE)
+        offset = int(query.get("offset", ["0"])[0])
+    except ValueError:
+        raise ApiError(400, "limit and offset must be integers")
+    if limit < 1 or offset < 0:
+        raise ApiError(400, "limit must be positive and offset non-negative")
+    start_date = parse_date(query, "start_date") or get_hot_start_date()
+    end_date = parse_date(query, "end_date")
+    df, total = get_transactions_page(username, limit, offset, start_date, end_date, raise_errors=True)
+    return {
+        "items": df.to_dict(orient="records"),
+        "limit": limit,
+        "offset": offset,
+        "start_date": start_date,
+        "end_date": end_date,
+        "total": total
+    }
+
+def parse_date(query, name):
+    value = query.get(name, [None])[0]
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ApiError(400, f"{name} must be YYYY-MM-DD")
+
+# API reads pass raise_errors=True so a database failure becomes a 500 without an ETag,
+# rather than an empty result that clients would keep revalidating
+def summary(username, query):
+    return create_financial_summary(get_monthly_totals(username, raise_errors=True))
+
+def budget_status(username, query):
+    return create_budget_status(get_monthly_totals(username, raise_errors=True),
+                                get_budget(username, raise_errors=True))
+
+def validate_rows(rows):
+    if not isinstance(rows, list) or not rows:
+        raise ApiError(400, "Body must be a non-empty list of transactions")
+    if len(rows) > MAX_BATCH_SIZE:
+        raise ApiError(413, f"At most {MAX_BATCH_SIZE} transactions per batch")
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise ApiError(400, f"Item {i} must be an object")
+        missing = [f for f in REQUIRED_FIELDS if f not in row]
+        if missing:
+            raise ApiError(400, f"Item {i} is missing {', '.join(missing)}")
+        if not isinstance(row["name"], str) or not isinstance(row["category"], str):
+            raise ApiError(400, f"Item {i} name and category must be strings")
+        if row["type"] not in TRANSACTION_TYPES:
+            raise ApiError(400, f"Item {i} has invalid type {row['type']!r}")
+        amount = row["amount"]
+        if isinstance(amount, bool) or not isinstance(amount, (int, float)) or amount < 0:
+            raise ApiError(400, f"Item {i} has invalid amount")
+        tags = row.get("tags") or []
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            raise ApiError(400, f"Item {i} tags must be a list of strings")
+        try:
+            # Store the canonical YYYY-MM-DD form that date-ranged reads compare against
+            row["date"] = date.fromisoformat(row["date"]).isoformat()
+        except (TypeError, ValueError):
+            raise ApiError(400, f"Item {i} date must be YYYY-MM-DD")
+
+# Read endpoints; their responses only change when the user's change_log advances
+GET_ROUTES = {
+    "/api/transactions": list_transactions,
+    "/api/summary": summary,
+    "/api/budgets/status": budget_status,
+}
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logging.info("%s - %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        self.handle_request(self.get)
+
+    def do_POST(self):
+        self.handle_request(self.post)
+
+    def do_DELETE(self):
+        self.handle_request(self.delete)
+
+    def handle_request(self, method):
+        self.body_read = False
+        try:
+            method(urlparse(self.path))
+        except ApiError as e:
+            self.send_json(e.status, {"error": e.message})
+        except Exception as e:
+            logging.exception(f"API error on {self.path}: {e}")
+            self.send_json(500, {"error": "Internal server error"})
+        finally:
+            # Unread body bytes would be parsed as the next request on a kept-alive connection
+            has_body = self.headers.get("Content-Length", "0") != "0" or "Transfer-Encoding" in self.headers
+            if has_body and not self.body_read:
+                self.close_connection = True
+
+    def get(self, url):
+        route = GET_ROUTES.get(url.path)
+        if route is None:
+            raise ApiError(404, "Not found")
+        username = self.authenticate()
+        # The per-user change_log seq lets us answer revalidations without running the query.
+        # The tag is weak because gzip and identity bodies of the same data share it, and it
+        # includes the default hot window, which moves without any change being logged.
+        key = zlib.crc32(f"{username}:{url.path}?{url.query}@{get_hot_start_date()}".encode())
+        etag = f'W/"{get_latest_seq(username, raise_errors=True)}-{key:x}"'
+        # If-None-Match uses weak comparison, so ignore W/ prefixes on either side
+        candidates = [t.strip().removeprefix("W/") for t in self.headers.get("If-None-Match", "").split(",")]
+        if etag.removeprefix("W/") in candidates:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_json(200, route(username, parse_qs(url.query)), etag=etag)
+
+    def post(self, url):
+        if url.path == "/api/token":
+            body = self.read_json()
+            if not isinstance(body, dict) or not verify_user(body.get("username"), str(body.get("password", ""))):
+                raise ApiError(401, "Invalid credentials")
+            self.send_json(201, {"token": create_api_token(body["username"])})
+        elif url.path == "/api/transactions":
+            username = self.authenticate()
+            rows = self.read_json()
+            validate_rows(rows)
+            inserted = add_transactions(username, rows)
+            if inserted != len(rows):
+                raise ApiError(500, "Could not insert transactions")
+            self.send_json(201, {"inserted": inserted})
+        else:
+            raise ApiError(404, "Not found")
+
+    def delete(self, url):
+        if url.path != "/api/token":
+            raise ApiError(404, "Not found")
+        self.authenticate()
+        revoke_api_token(self.headers["Authorization"][7:])
+        self.send_json(200, {"revoked": True})
+
+    def authenticate(self):
+        header = self.headers.get("Authorization", "")
+        username = get_token_user(header[7:]) if header.startswith("Bearer ") else None
+        if not username:
+            raise ApiError(401, "Missing or invalid token")
+        return username
+
+    def read_json(self):
+        header = self.headers.get("Content-Length")
+        if header is None:
+            raise ApiError(411, "Content-Length required")
+        try:
+            length = int(header)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY_SIZE:
+            if length < 0:
+                raise ApiError(400, "Invalid Content-Length")
+            raise ApiError(413, f"Body must be at most {MAX_BODY_SIZE} bytes")
+        body = self.rfile.read(length)
+        self.body_read = True
+        try:
+            return json.loads(body or b"null")
+        except ValueError:
+            raise ApiError(400, "Invalid JSON body")
+
+    def send_json(self, status, payload, etag=None):
+        body = json.dumps(payload, default=str).encode()
+        gzipped = len(body) >= GZIP_MIN_SIZE and "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            body = gzip.compress(body, compresslevel=5)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "Accept-Encoding, Authorization")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "private, no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+def main():
+    parser = argparse.ArgumentParser(description="Finance Tracker JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    logging.basicConfig(filename='finance_api.log', level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    update_db_schema()
+    init_db()
+    prune_change_log()
+
+    server = ThreadingHTTPServer((args.host, args.port), ApiHandler)
+    print(f"Serving API on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
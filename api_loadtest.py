@@ -0,0 +1,110 @@
+"""Load test for api.py against a local instance.
+
+Usage: python api_loadtest.py --username alice --password 'Secret@123' --requests 2000 --concurrency 16
+
+Seeds a batch of transactions, then hammers the read endpoints and reports
+requests/sec and latency percentiles per endpoint.
+"""
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from api import MAX_BATCH_SIZE
+
+ENDPOINTS = ["/api/transactions?limit=100", "/api/summary", "/api/budgets/status"]
+
+def call(base_url, path, token=None, body=None, headers=None):
+    req = urllib.request.Request(base_url + path, method="POST" if body is not None else "GET")
+    req.add_header("Content-Type", "application/json")
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    for key, value in (headers or {}).items():
+        req.add_header(key, value)
+    data = json.dumps(body).encode() if body is not None else None
+    try:
+        with urllib.request.urlopen(req, data=data, timeout=30) as resp:
+            return resp.status, resp.headers, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+def seed(base_url, token, count):
+    categories = ["Food", "Transport", "Bills", "Shopping", "Entertainment", "Other"]
+    start = date.today() - timedelta(days=365)
+    rows = [{
+        "name": f"Load test {i}",
+        "category": random.choice(categories),
+        "amount": round(random.uniform(50, 5000), 2),
+        "type": random.choice(["Income", "Expense"]),
+        "date": str(start + timedelta(days=random.randrange(365))),
+        "tags": ["One-time"]
+    } for i in range(count)]
+    started = time.perf_counter()
+    for i in range(0, count, MAX_BATCH_SIZE):
+        status, _, body = call(base_url, "/api/transactions", token, rows[i:i + MAX_BATCH_SIZE])
+        if status != 201:
+            raise SystemExit(f"Seeding failed at row {i} (HTTP {status}): {body.decode()}")
+    print(f"Seeded {count} transactions in {time.perf_counter() - started:.3f}s")
+
+def run(base_url, token, path, total, concurrency, revalidate):
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    etag = None
+    if revalidate:
+        _, headers, _ = call(base_url, path, token)
+        etag = headers.get("ETag")
+
+    def worker(_):
+        headers = {"Accept-Encoding": "gzip"}
+        if etag:
+            headers["If-None-Match"] = etag
+        started = time.perf_counter()
+        status, _, _ = call(base_url, path, token, headers=headers)
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    pct = lambda p: latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+    label = f"{path} (If-None-Match)" if revalidate else path
+    print(f"{label}\n"
+          f"  {total / wall:,.1f} req/s  statuses={statuses}\n"
+          f"  latency ms: mean={statistics.mean(latencies) * 1000:.2f} p50={pct(0.5):.2f} "
+          f"p95={pct(0.95):.2f} p99={pct(0.99):.2f} max={latencies[-1] * 1000:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Finance Tracker JSON API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0, help="Transactions to insert before testing")
+    args = parser.parse_args()
+
+    status, _, body = call(args.url, "/api/token", body={"username": args.username, "password": args.password})
+    if status != 201:
+        raise SystemExit(f"Login failed (HTTP {status}): {body.decode()}")
+    token = json.loads(body)["token"]
+
+    if args.seed:
+        seed(args.url, token, args.seed)
+    for path in ENDPOINTS:
+        run(args.url, token, path, args.requests, args.concurrency, revalidate=False)
+        run(args.url, token, path, args.requests, args.concurrency, revalidate=True)
+
+if __name__ == "__main__":
+    main()
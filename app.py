@@ -13,6 +13,8 @@ from database import init_db, update_db_schema
 from auth import *
 from transactions import *
 from viz import *
+from archive import (ARCHIVE_HORIZON_DAYS, archive_transactions, get_archive_cutoff, get_hot_start_date,
+                     get_monthly_totals, run_maintenance)
 
 # Initialize app
 apply_global_styles()
@@ -27,6 +29,7 @@ logging.basicConfig(filename='finance_app.log', level=logging.INFO,
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
     st.session_state.username = None
+    prune_change_log()
 
 if not st.session_state.logged_in:
     # Login Page with Enhanced UI
@@ -91,6 +94,7 @@ else:
     if st.sidebar.button("Logout", use_container_width=True):
         st.session_state.logged_in = False
         st.session_state.username = None
+        st.session_state.tx_cache_user = None
         st.rerun()
     
     # Main Content
@@ -100,12 +104,27 @@ else:
         color_name="blue-70"
     )
     
-    # Get transaction data
-    df = get_transactions(st.session_state.username)
+    # Get recent (hot tier) transaction data, applying only the changes since the last rerun
+    if st.session_state.get('tx_cache_user') != st.session_state.username:
+        st.session_state.tx_start = get_hot_start_date()
+        st.session_state.tx_seq = get_latest_seq()
+        st.session_state.tx_df = get_transactions(st.session_state.username, st.session_state.tx_start)
+        st.session_state.tx_cache_user = st.session_state.username
+        st.session_state.monthly_seq = None
+    else:
+        st.session_state.tx_df, st.session_state.tx_seq = apply_transaction_changes(
+            st.session_state.tx_df, st.session_state.username, st.session_state.tx_seq, st.session_state.tx_start)
+    df = st.session_state.tx_df.copy()
+    
+    # Full-history totals come from monthly aggregates and are only recomputed after a change
+    if st.session_state.get('monthly_seq') != st.session_state.tx_seq:
+        st.session_state.monthly = get_monthly_totals(st.session_state.username)
+        st.session_state.monthly_seq = st.session_state.tx_seq
+    monthly = st.session_state.monthly
     
     # Summary Metrics
-    if not df.empty:
-        summary = create_financial_summary(df)
+    if not monthly.empty:
+        summary = create_financial_summary(monthly)
         
         col1, col2, col3, col4 = st.columns(4)
         col1.metric("Total Income", f"KSH {summary['income']:,.2f}")
@@ -136,11 +155,11 @@ else:
         # Dashboard View
         st.subheader("Financial Overview")
         
-        if not df.empty:
+        if not monthly.empty:
             col1, col2 = st.columns([2, 1])
             
             with col1:
-                st.plotly_chart(create_trend_chart(df), use_container_width=True, key="trend_chart_1")
+                st.plotly_chart(create_trend_chart(monthly), use_container_width=True, key="trend_chart_1")
             
             with col2:
                 sunburst = create_category_sunburst(df)
@@ -154,12 +173,11 @@ else:
             df_budget = get_budget(st.session_state.username)
             
             if not df_budget.empty:
-                for index, row in df_budget.iterrows():
-                    category = row["category"]
-                    budget_amount = row["budget_amount"]
-                    expenses = df[(df["category"] == category) & (df["type"] == "Expense")]["amount"].sum()
-                    
-                    progress = min(expenses / budget_amount, 1) if budget_amount > 0 else 0
+                for item in create_budget_status(monthly, df_budget):
+                    category = item["category"]
+                    budget_amount = item["budget"]
+                    expenses = item["spent"]
+                    progress = item["progress"]
                     
                     st.write(f"**{category}** (Budget: KSH {budget_amount:,.2f})")
                     st.progress(progress, text=f"KSH {expenses:,.2f} of KSH {budget_amount:,.2f} ({progress*100:.1f}%)")
@@ -192,6 +210,7 @@ else:
         
         # Transaction Table with Filters
         if not df.empty:
+            st.caption(f"Showing transactions since {st.session_state.tx_start}. The CSV export includes the full history.")
             filtered_df = dataframe_explorer(df, case=False)
             st.dataframe(filtered_df, use_container_width=True)
             
@@ -210,13 +229,13 @@ else:
         # Advanced Analytics
         st.subheader("Financial Analytics")
         
-        if not df.empty:
+        if not monthly.empty:
             col1, col2 = st.columns(2)
             
             with col1:
                 # Expense by Category (Bar Chart)
                 st.write("### Expenses by Category")
-                df_expenses = df[df['type'] == 'Expense']
+                df_expenses = monthly[monthly['type'] == 'Expense']
                 
                 if not df_expenses.empty:
                     category_sum = df_expenses.groupby('category')['amount'].sum().reset_index()
@@ -237,7 +256,7 @@ else:
             with col2:
                 # Income vs Expense Pie Chart
                 st.write("### Income vs Expense Distribution")
-                type_sum = df.groupby('type')['amount'].sum().reset_index()
+                type_sum = monthly.groupby('type')['amount'].sum().reset_index()
                 fig = px.pie(
                     type_sum,
                     names='type',
@@ -251,7 +270,7 @@ else:
             
             # Monthly Trends
             st.write("### Monthly Trends")
-            st.plotly_chart(create_trend_chart(df), use_container_width=True, key="trend_chart_2")
+            st.plotly_chart(create_trend_chart(monthly), use_container_width=True, key="trend_chart_2")
         
         else:
             st.info("No transactions found. Add some transactions to see analytics.")
@@ -274,6 +293,8 @@ else:
                         hashed_password = hash_password(new_pw)
                         c.execute("UPDATE users SET password = ? WHERE username = ?", 
                                   (hashed_password, st.session_state.username))
+                        # API tokens issued under the old password must stop working
+                        c.execute("DELETE FROM api_tokens WHERE username = ?", (st.session_state.username,))
                         conn.commit()
                         conn.close()
                         st.success("Password updated successfully!")
@@ -336,4 +357,18 @@ else:
             with st.expander("🛠 Admin Tools"):
                 st.warning("Administrator Tools")
                 if st.button("Export All Data", use_container_width=True):
-                    st.info("Feature coming soon!")
\ No newline at end of file
+                    st.info("Feature coming soon!")
+                
+                st.write("Archive old transactions")
+                cutoff = get_archive_cutoff()
+                st.caption(f"Archived up to: {cutoff}" if cutoff else "Nothing archived yet")
+                horizon_days = st.number_input("Archive transactions older than (days)",
+                                               value=ARCHIVE_HORIZON_DAYS, min_value=30, step=30)
+                if st.button("Archive Transactions", use_container_width=True):
+                    moved = archive_transactions(int(horizon_days))
+                    st.success(f"Archived {moved} transactions")
+                
+                if st.button("Run Database Maintenance", use_container_width=True):
+                    for path, stats in run_maintenance().items():
+                        st.write(f"**{path}**: {stats['before']:,} → {stats['after']:,} bytes "
+                                 f"({stats['reclaimed']:,} reclaimed)")
\ No newline at end of file
@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import logging
+from datetime import date, timedelta
+import pandas as pd
+import streamlit as st
+from database import DB_PATH, ARCHIVE_DB_PATH, get_db_connection, init_archive_db, attach_archive
+from transactions import TRANSACTION_COLUMNS, prune_change_log
+
+# Transactions dated further back than this are moved to the cold tier
+ARCHIVE_HORIZON_DAYS = 365
+
+def get_archive_cutoff():
+    conn = get_db_connection()
+    try:
+        if not attach_archive(conn):
+            return None
+        cutoff = conn.execute("SELECT value FROM archive.archive_meta WHERE key = 'cutoff'").fetchone()
+        return cutoff[0] if cutoff else None
+    finally:
+        conn.close()
+
+def get_hot_start_date(horizon_days=ARCHIVE_HORIZON_DAYS):
+    """Start of the default read window; never before the archive cutoff, so it is served by the hot tier alone"""
+    start = (date.today() - timedelta(days=horizon_days)).isoformat()
+    cutoff = get_archive_cutoff()
+    return max(start, cutoff) if cutoff else start
+
+def archive_transactions(horizon_days=ARCHIVE_HORIZON_DAYS):
+    """Move transactions older than the horizon into the archive; returns the number of rows moved"""
+    cutoff = (date.today() - timedelta(days=horizon_days)).isoformat()
+    init_archive_db()
+    conn = get_db_connection()
+    try:
+        attach_archive(conn)
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("""CREATE TEMP TABLE to_archive AS
+                     SELECT id FROM main.transactions WHERE date < ?""", (cutoff,))
+        moved = conn.execute("SELECT COUNT(*) FROM temp.to_archive").fetchone()[0]
+
+        if moved:
+            conn.execute("""INSERT INTO archive.monthly_aggregates (username, month, category, type, total, count)
+                         SELECT username, strftime('%Y-%m', date), category, type, SUM(amount), COUNT(*)
+                         FROM main.transactions WHERE id IN (SELECT id FROM temp.to_archive)
+                         GROUP BY 1, 2, 3, 4
+                         ON CONFLICT (username, month, category, type) DO UPDATE SET
+                             total = total + excluded.total,
+                             count = count + excluded.count""")
+            conn.execute(f"""INSERT INTO archive.transactions ({TRANSACTION_COLUMNS})
+                          SELECT {TRANSACTION_COLUMNS} FROM main.transactions
+                          WHERE id IN (SELECT id FROM temp.to_archive)""")
+            # Archived rows still exist for readers, so they must not look deleted to change_log consumers
+            last_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+            conn.execute("DELETE FROM main.transactions WHERE id IN (SELECT id FROM temp.to_archive)")
+            conn.execute("DELETE FROM change_log WHERE seq > ?", (last_seq,))
+            # The delete triggers moved these rows' totals out of the hot aggregates
+            conn.execute("DELETE FROM main.monthly_aggregates WHERE count = 0")
+
+        conn.execute("""INSERT INTO archive.archive_meta (key, value) VALUES ('cutoff', ?)
+                     ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)""", (cutoff,))
+        conn.execute("DROP TABLE temp.to_archive")
+        conn.commit()
+        logging.info(f"Archived {moved} transactions dated before {cutoff}")
+        return moved
+    except sqlite3.Error as e:
+        conn.rollback()
+        st.error(f"Error archiving transactions: {e}")
+        return 0
+    finally:
+        conn.close()
+
+def get_monthly_totals(username, raise_errors=False):
+    """Monthly totals per category and type across both tiers, read from the aggregate tables only.
+
+    The total is returned as "amount" so the frame can be passed to the viz summary functions.
+    """
+    conn = get_db_connection()
+    try:
+        source = "SELECT month, category, type, total, count FROM main.monthly_aggregates WHERE username = ?"
+        params = [username]
+        if attach_archive(conn):
+            source += " UNION ALL SELECT month, category, type, total, count FROM archive.monthly_aggregates WHERE username = ?"
+            params.append(username)
+        # Rows whose transactions were all deleted or moved stay behind with a zero count
+        query = f"""SELECT month, category, type, SUM(total) AS amount, SUM(count) AS count
+                    FROM ({source}) GROUP BY 1, 2, 3 HAVING SUM(count) != 0 ORDER BY month"""
+        return pd.read_sql_query(query, conn, params=params)
+    except sqlite3.Error as e:
+        if raise_errors:
+            raise
+        st.error(f"Error fetching monthly totals: {e}")
+        return pd.DataFrame()
+    finally:
+        conn.close()
+
+def run_maintenance():
+    """Prune the change log, then ANALYZE and VACUUM both tiers; returns bytes reclaimed per database file"""
+    prune_change_log()
+    report = {}
+    for path in (DB_PATH, ARCHIVE_DB_PATH):
+        if not os.path.exists(path):
+            continue
+        # isolation_level=None keeps the connection in autocommit, which VACUUM requires
+        conn = sqlite3.connect(path, isolation_level=None, timeout=30)
+        try:
+            # ANALYZE writes statistics pages, so run it before measuring what VACUUM frees
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+            before = os.path.getsize(path)
+            conn.execute("VACUUM")
+        except sqlite3.Error as e:
+            st.error(f"Maintenance failed for {path}: {e}")
+            continue
+        finally:
+            conn.close()
+        after = os.path.getsize(path)
+        report[path] = {'before': before, 'after': after, 'reclaimed': before - after}
+        logging.info(f"Maintenance on {path}: reclaimed {before - after} bytes")
+    return report
@@ -3,11 +3,14 @@ import hashlib
 import re
 import logging
 import random
+import secrets
 import string
 from datetime import datetime, timedelta
 import streamlit as st
 from database import get_db_connection
 
+API_TOKEN_TTL_DAYS = 30
+
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
@@ -34,6 +37,33 @@ def get_user_role(username):
     conn.close()
     return role[0] if role else None
 
+def token_expiry_cutoff():
+    # created_at is CURRENT_TIMESTAMP, so compare in SQLite's UTC clock
+    return f"-{API_TOKEN_TTL_DAYS} days"
+
+def create_api_token(username):
+    token = secrets.token_urlsafe(32)
+    conn = get_db_connection()
+    conn.execute("DELETE FROM api_tokens WHERE created_at < datetime('now', ?)", (token_expiry_cutoff(),))
+    conn.execute("INSERT INTO api_tokens (token_hash, username) VALUES (?, ?)",
+                (hash_password(token), username))
+    conn.commit()
+    conn.close()
+    return token
+
+def get_token_user(token):
+    conn = get_db_connection()
+    user = conn.execute("SELECT username FROM api_tokens WHERE token_hash = ? AND created_at >= datetime('now', ?)",
+                       (hash_password(token), token_expiry_cutoff())).fetchone()
+    conn.close()
+    return user[0] if user else None
+
+def revoke_api_token(token):
+    conn = get_db_connection()
+    conn.execute("DELETE FROM api_tokens WHERE token_hash = ?", (hash_password(token),))
+    conn.commit()
+    conn.close()
+
 def is_password_strong(password):
     if len(password) < 8: return False
     if not re.search(r"[A-Z]", password): return False
@@ -62,6 +92,8 @@ def reset_password(username, token, new_password):
     if user and user[0] == token and datetime.now() < datetime.strptime(user[1], "%Y-%m-%d %H:%M:%S"):
         conn.execute("UPDATE users SET password = ?, reset_token = NULL, reset_token_expiry = NULL WHERE username = ?",
                     (hash_password(new_password), username))
+        # Tokens issued under the old password must stop working
+        conn.execute("DELETE FROM api_tokens WHERE username = ?", (username,))
         conn.commit()
         conn.close()
         return True
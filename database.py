@@ -1,10 +1,17 @@
+import os
 import sqlite3
 import logging
 import streamlit as st
 
+DB_PATH = "finance.db"
+ARCHIVE_DB_PATH = "finance_archive.db"
+
+# Tables whose row changes are recorded in change_log
+CHANGE_TRACKED_TABLES = ("transactions", "budgets", "recurring_transactions")
+
 def update_db_schema():
     """Update database schema if needed"""
-    conn = sqlite3.connect("finance.db")
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     try:
         # Try to add role column if it doesn't exist
@@ -17,7 +24,7 @@ def update_db_schema():
 
 def init_db():
     """Initialize database with all tables"""
-    conn = sqlite3.connect("finance.db")
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
 
     # Create users table if not exists
@@ -35,7 +42,7 @@ def init_db():
     
     # Create transactions table (will do nothing if exists)
     c.execute('''CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY, 
+                id INTEGER PRIMARY KEY AUTOINCREMENT, 
                 username TEXT DEFAULT 'default_user',
                 name TEXT, 
                 category TEXT, 
@@ -66,6 +73,33 @@ def init_db():
         except sqlite3.Error as e:
             st.error(f"Transaction migration error: {e}")
 
+    # Archived ids must never be handed out again, which needs AUTOINCREMENT
+    c.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'transactions'")
+    if 'AUTOINCREMENT' not in c.fetchone()[0].upper():
+        try:
+            c.execute('''CREATE TABLE transactions_new (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT, 
+                        username TEXT DEFAULT 'default_user',
+                        name TEXT, 
+                        category TEXT, 
+                        amount REAL, 
+                        type TEXT, 
+                        date TEXT, 
+                        tags TEXT)''')
+            c.execute('''INSERT INTO transactions_new 
+                        (id, username, name, category, amount, type, date, tags)
+                        SELECT id, username, name, category, amount, type, date, tags 
+                        FROM transactions''')
+            c.execute('DROP TABLE transactions')
+            c.execute('ALTER TABLE transactions_new RENAME TO transactions')
+            # Start numbering above every id already used, including archived rows
+            c.execute("SELECT COALESCE(MAX(id), 0) FROM transactions")
+            high_water = max(c.fetchone()[0], get_archived_max_id())
+            c.execute("DELETE FROM sqlite_sequence WHERE name = 'transactions'")
+            c.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('transactions', ?)", (high_water,))
+        except sqlite3.Error as e:
+            st.error(f"Transaction migration error: {e}")
+
     # Create budgets table
     c.execute('''CREATE TABLE IF NOT EXISTS budgets (
                 id INTEGER PRIMARY KEY,
@@ -84,9 +118,159 @@ def init_db():
                 frequency TEXT,
                 next_due_date TEXT)''')
 
+    # Indexes used by date-ranged reads and by the archival job
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_transactions_user_date
+                ON transactions (username, date)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_transactions_date
+                ON transactions (date)''')
+
+    # Create API tokens table (tokens are stored hashed)
+    c.execute('''CREATE TABLE IF NOT EXISTS api_tokens (
+                token_hash TEXT PRIMARY KEY,
+                username TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP)''')
+
+    # Create change log fed by triggers so clients can sync deltas
+    c.execute('''CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT,
+                table_name TEXT,
+                row_id INTEGER,
+                op TEXT,
+                changed_at TEXT DEFAULT CURRENT_TIMESTAMP)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_change_log_user_seq
+                ON change_log (username, seq)''')
+    create_change_triggers(c)
+
+    # Create monthly totals for the hot tier, kept current by triggers so
+    # summaries never have to scan transactions
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'monthly_aggregates'")
+    backfill = c.fetchone() is None
+    c.execute('''CREATE TABLE IF NOT EXISTS monthly_aggregates (
+                username TEXT,
+                month TEXT,
+                category TEXT,
+                type TEXT,
+                total REAL,
+                count INTEGER,
+                PRIMARY KEY (username, month, category, type))''')
+    if backfill:
+        c.execute('''INSERT INTO monthly_aggregates (username, month, category, type, total, count)
+                    SELECT username, strftime('%Y-%m', date), category, type, SUM(COALESCE(amount, 0)), COUNT(*)
+                    FROM transactions GROUP BY 1, 2, 3, 4''')
+    create_monthly_aggregate_triggers(c)
+
+    # Highest change_log seq removed by pruning; clients behind it must reload
+    c.execute('''CREATE TABLE IF NOT EXISTS sync_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER)''')
+
     conn.commit()
     conn.close()
 
+def create_change_triggers(c):
+    """Create insert/update/delete triggers that record row changes in change_log"""
+    for table in CHANGE_TRACKED_TABLES:
+        for op, ref in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_{op.lower()}_log
+                        AFTER {op} ON {table}
+                        BEGIN
+                            INSERT INTO change_log (username, table_name, row_id, op)
+                            VALUES ({ref}.username, '{table}', {ref}.id, '{op.lower()}');
+                        END''')
+        # An update that moves a row to another user is a delete for the old owner
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_reassign_log
+                    AFTER UPDATE OF username ON {table}
+                    WHEN OLD.username IS NOT NEW.username
+                    BEGIN
+                        INSERT INTO change_log (username, table_name, row_id, op)
+                        VALUES (OLD.username, '{table}', OLD.id, 'delete');
+                    END''')
+
+def create_monthly_aggregate_triggers(c):
+    """Create triggers that add each transaction to, or take it out of, its monthly_aggregates row"""
+    def apply(ref, sign):
+        return f'''INSERT INTO monthly_aggregates (username, month, category, type, total, count)
+                   VALUES ({ref}.username, strftime('%Y-%m', {ref}.date), {ref}.category, {ref}.type,
+                           {sign}COALESCE({ref}.amount, 0), {sign}1)
+                   ON CONFLICT (username, month, category, type) DO UPDATE SET
+                       total = total + excluded.total,
+                       count = count + excluded.count;'''
+
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS transactions_insert_monthly
+                AFTER INSERT ON transactions
+                BEGIN
+                    {apply("NEW", "")}
+                END''')
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS transactions_delete_monthly
+                AFTER DELETE ON transactions
+                BEGIN
+                    {apply("OLD", "-")}
+                END''')
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS transactions_update_monthly
+                AFTER UPDATE OF username, category, amount, type, date ON transactions
+                BEGIN
+                    {apply("OLD", "-")}
+                    {apply("NEW", "")}
+                END''')
+
 def get_db_connection():
     """Get a database connection"""
-    return sqlite3.connect("finance.db")
\ No newline at end of file
+    return sqlite3.connect(DB_PATH)
+
+def init_archive_db():
+    """Initialize the cold-tier database holding archived transactions"""
+    conn = sqlite3.connect(ARCHIVE_DB_PATH)
+    c = conn.cursor()
+
+    # Same layout as the hot transactions table so the tiers can be unioned
+    c.execute('''CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY, 
+                username TEXT DEFAULT 'default_user',
+                name TEXT, 
+                category TEXT, 
+                amount REAL, 
+                type TEXT, 
+                date TEXT, 
+                tags TEXT)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_archive_user_date
+                ON transactions (username, date)''')
+
+    # Monthly totals written before rows are moved out of the hot tier
+    c.execute('''CREATE TABLE IF NOT EXISTS monthly_aggregates (
+                username TEXT,
+                month TEXT,
+                category TEXT,
+                type TEXT,
+                total REAL,
+                count INTEGER,
+                PRIMARY KEY (username, month, category, type))''')
+
+    # Everything archived is dated before the stored cutoff
+    c.execute('''CREATE TABLE IF NOT EXISTS archive_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT)''')
+
+    conn.commit()
+    conn.close()
+
+def get_archived_max_id():
+    """Return the highest transaction id in the archive, or 0 if there is none"""
+    if not os.path.exists(ARCHIVE_DB_PATH):
+        return 0
+    conn = sqlite3.connect(ARCHIVE_DB_PATH)
+    try:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+    finally:
+        conn.close()
+
+def attach_archive(conn):
+    """Attach the cold tier as schema "archive"; returns False if nothing has been archived yet"""
+    if not os.path.exists(ARCHIVE_DB_PATH):
+        return False
+    if any(db[1] == "archive" for db in conn.execute("PRAGMA database_list")):
+        return True
+    conn.execute("ATTACH DATABASE ? AS archive", (ARCHIVE_DB_PATH,))
+    return True
\ No newline at end of file
@@ -1,7 +1,13 @@
 import sqlite3
+from datetime import date, datetime, timedelta
 import pandas as pd
 import streamlit as st
-from database import get_db_connection
+from database import get_db_connection, attach_archive
+
+TRANSACTION_COLUMNS = "id, username, name, category, amount, type, date, tags"
+
+# change_log entries older than this are pruned
+CHANGE_LOG_RETENTION_DAYS = 30
 
 def add_transaction(username, name, category, amount, t_type, date, tags=None):
     if tags is None:
@@ -18,12 +24,65 @@ def add_transaction(username, name, category, amount, t_type, date, tags=None):
     finally:
         conn.close()
 
-def get_transactions(username=None):
+def add_transactions(username, rows):
+    """Insert many transactions in a single commit; returns the number inserted"""
     conn = get_db_connection()
     try:
-        query = "SELECT * FROM transactions" + (" WHERE username = ?" if username else "")
-        params = (username,) if username else ()
-        df = pd.read_sql_query(query, conn, params=params)
+        conn.executemany("""INSERT INTO transactions 
+                         (username, name, category, amount, type, date, tags) 
+                         VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                         [(username, r['name'], r['category'], r['amount'], r['type'], r['date'],
+                           ', '.join(r.get('tags') or [])) for r in rows])
+        conn.commit()
+        return len(rows)
+    except sqlite3.Error as e:
+        st.error(f"Error adding transactions: {e}")
+        return 0
+    finally:
+        conn.close()
+
+def iso_date(value):
+    """Normalise a date, datetime or date string to the YYYY-MM-DD form stored in the date column"""
+    if isinstance(value, datetime):
+        value = value.date()
+    elif isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return value.isoformat()
+
+def date_filters(start_date=None, end_date=None):
+    """Build WHERE clauses on the raw date column so idx_transactions_user_date can serve the range"""
+    filters, params = [], []
+    if start_date:
+        filters.append("date >= ?")
+        params.append(iso_date(start_date))
+    if end_date:
+        # Compare against the next day so timestamped values on end_date are kept
+        filters.append("date < ?")
+        params.append((date.fromisoformat(iso_date(end_date)) + timedelta(days=1)).isoformat())
+    return filters, params
+
+def transactions_source(conn, start_date=None):
+    """Return the table to read from, unioning the archive only when start_date reaches before its cutoff"""
+    if not attach_archive(conn):
+        return "transactions"
+    cutoff = conn.execute("SELECT value FROM archive.archive_meta WHERE key = 'cutoff'").fetchone()
+    if cutoff is None or (start_date and iso_date(start_date) >= cutoff[0]):
+        return "main.transactions"
+    return (f"(SELECT {TRANSACTION_COLUMNS} FROM main.transactions "
+            f"UNION ALL SELECT {TRANSACTION_COLUMNS} FROM archive.transactions)")
+
+def get_transactions(username=None, start_date=None, end_date=None):
+    conn = get_db_connection()
+    try:
+        filters, params = date_filters(start_date, end_date)
+        if username:
+            filters.insert(0, "username = ?")
+            params.insert(0, username)
+        query = f"SELECT * FROM {transactions_source(conn, start_date)}"
+        if filters:
+            query += " WHERE " + " AND ".join(filters)
+        # Neither the archive union nor the (username, date) index returns rows in id order
+        df = pd.read_sql_query(query + " ORDER BY id", conn, params=params)
         if not df.empty and 'amount' in df.columns:
             df['amount'] = pd.to_numeric(df['amount'])
         return df
@@ -33,18 +92,139 @@ def get_transactions(username=None):
     finally:
         conn.close()
 
-def get_budget(username=None):
+def get_transactions_page(username, limit=100, offset=0, start_date=None, end_date=None, raise_errors=False):
+    """Return one page of a user's transactions ordered by id, plus the total count"""
+    conn = get_db_connection()
+    try:
+        source = transactions_source(conn, start_date)
+        filters, params = date_filters(start_date, end_date)
+        where = " AND ".join(["username = ?", *filters])
+        params = [username, *params]
+        total = conn.execute(f"SELECT COUNT(*) FROM {source} WHERE {where}", params).fetchone()[0]
+        df = pd.read_sql_query(f"SELECT * FROM {source} WHERE {where} ORDER BY id LIMIT ? OFFSET ?",
+                               conn, params=[*params, limit, offset])
+        if not df.empty:
+            df['amount'] = pd.to_numeric(df['amount'])
+        return df, total
+    except sqlite3.Error as e:
+        if raise_errors:
+            raise
+        st.error(f"Error fetching transactions: {e}")
+        return pd.DataFrame(), 0
+    finally:
+        conn.close()
+
+def get_budget(username=None, raise_errors=False):
     conn = get_db_connection()
     try:
         query = "SELECT * FROM budgets" + (" WHERE username = ?" if username else "")
         params = (username,) if username else ()
         return pd.read_sql_query(query, conn, params=params)
     except sqlite3.Error as e:
+        if raise_errors:
+            raise
         st.error(f"Error fetching budgets: {e}")
         return pd.DataFrame()
     finally:
         conn.close()
 
+def get_changes(username, since_seq=0, table_name=None):
+    """Return change_log entries for a user with seq greater than since_seq"""
+    conn = get_db_connection()
+    try:
+        query = "SELECT seq, table_name, row_id, op, changed_at FROM change_log WHERE username = ? AND seq > ?"
+        params = [username, since_seq]
+        if table_name:
+            query += " AND table_name = ?"
+            params.append(table_name)
+        return pd.read_sql_query(query + " ORDER BY seq", conn, params=params)
+    except sqlite3.Error as e:
+        st.error(f"Error fetching changes: {e}")
+        return pd.DataFrame(columns=['seq', 'table_name', 'row_id', 'op', 'changed_at'])
+    finally:
+        conn.close()
+
+def get_pruned_seq(conn):
+    pruned = conn.execute("SELECT value FROM sync_meta WHERE key = 'pruned_through'").fetchone()
+    return pruned[0] if pruned else 0
+
+def get_latest_seq(username=None, raise_errors=False):
+    """Return the newest change_log seq (for a user, if given), never lower than the pruned seq"""
+    conn = get_db_connection()
+    try:
+        query = "SELECT COALESCE(MAX(seq), 0) FROM change_log" + (" WHERE username = ?" if username else "")
+        params = (username,) if username else ()
+        return max(conn.execute(query, params).fetchone()[0], get_pruned_seq(conn))
+    except sqlite3.Error as e:
+        if raise_errors:
+            raise
+        st.error(f"Error fetching latest change: {e}")
+        return 0
+    finally:
+        conn.close()
+
+def prune_change_log(retention_days=CHANGE_LOG_RETENTION_DAYS):
+    """Delete change_log entries older than the retention window; returns the number removed"""
+    conn = get_db_connection()
+    try:
+        # seq grows with changed_at, so prune by seq to delete along the primary key
+        through = conn.execute("SELECT MAX(seq) FROM change_log WHERE changed_at < datetime('now', ?)",
+                               (f"-{int(retention_days)} days",)).fetchone()[0]
+        if through is None:
+            return 0
+        removed = conn.execute("DELETE FROM change_log WHERE seq <= ?", (through,)).rowcount
+        conn.execute("""INSERT INTO sync_meta (key, value) VALUES ('pruned_through', ?)
+                     ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)""", (through,))
+        conn.commit()
+        return removed
+    except sqlite3.Error as e:
+        st.error(f"Error pruning change log: {e}")
+        return 0
+    finally:
+        conn.close()
+
+def apply_transaction_changes(df, username, since_seq, start_date=None):
+    """Bring a cached transactions frame (optionally limited to rows from start_date) up to date; returns (df, last_seq)"""
+    conn = get_db_connection()
+    try:
+        pruned_seq = get_pruned_seq(conn)
+    finally:
+        conn.close()
+    if since_seq < pruned_seq:
+        # The changes since since_seq are no longer all in the log
+        last_seq = get_latest_seq()
+        return get_transactions(username, start_date), last_seq
+
+    changes = get_changes(username, since_seq, table_name='transactions')
+    if changes.empty:
+        return df, since_seq
+    last_seq = int(changes['seq'].iloc[-1])
+    latest = changes.drop_duplicates('row_id', keep='last')
+    changed_ids = [int(i) for i in latest['row_id']]
+    live_ids = [int(i) for i in latest.loc[latest['op'] != 'delete', 'row_id']]
+
+    if not df.empty:
+        df = df[~df['id'].isin(changed_ids)]
+    if live_ids:
+        conn = get_db_connection()
+        try:
+            placeholders = ', '.join('?' * len(live_ids))
+            filters, params = date_filters(start_date)
+            query = f"SELECT * FROM transactions WHERE username = ? AND id IN ({placeholders})"
+            fresh = pd.read_sql_query(" AND ".join([query, *filters]), conn,
+                                      params=[username, *live_ids, *params])
+        except sqlite3.Error as e:
+            st.error(f"Error applying changes: {e}")
+            return get_transactions(username, start_date), last_seq
+        finally:
+            conn.close()
+        if not fresh.empty:
+            fresh['amount'] = pd.to_numeric(fresh['amount'])
+            df = fresh if df.empty else pd.concat([df, fresh])
+    if df.empty:
+        return df, last_seq
+    return df.sort_values('id').reset_index(drop=True), last_seq
+
 def export_to_csv(username):
     df = get_transactions(username)
     return df.to_csv(index=False)
\ No newline at end of file
@@ -31,13 +31,31 @@ def create_financial_summary(df):
             'savings_rate': 0
         }
 
+def create_budget_status(df, df_budget):
+    status = []
+    for _, row in df_budget.iterrows():
+        budget_amount = float(row['budget_amount'])
+        if df.empty:
+            expenses = 0.0
+        else:
+            expenses = float(df[(df['category'] == row['category']) & (df['type'] == 'Expense')]['amount'].sum())
+        status.append({
+            'category': row['category'],
+            'budget': budget_amount,
+            'spent': expenses,
+            'progress': min(expenses / budget_amount, 1) if budget_amount > 0 else 0
+        })
+    return status
+
 def create_trend_chart(df):
     if df.empty:
         return go.Figure()
     
     try:
-        df['date'] = pd.to_datetime(df['date'], format='mixed')
-        df['month'] = df['date'].dt.to_period('M').astype(str)
+        # Accepts raw transactions or pre-aggregated rows that already carry a month
+        if 'month' not in df.columns:
+            df['date'] = pd.to_datetime(df['date'], format='mixed')
+            df['month'] = df['date'].dt.to_period('M').astype(str)
         
         monthly_data = df.groupby(['month', 'type'])['amount'].sum().unstack().fillna(0)
         monthly_data['Net'] = monthly_data.get('Income', 0) - monthly_data.get('Expense', 0)